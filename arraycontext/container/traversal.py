@@ -669,6 +669,67 @@ def with_array_context(ary: ArrayOrContainerT,
         return deserialize_container(ary, [(key, with_array_context(subary, actx))
                                            for key, subary in iterable])
 
+
+_with_array_context_default = with_array_context.dispatch(object)
+
+
+def _with_array_context_shallow(ary: ArrayOrContainerT,
+                                actx: ArrayContext | None) -> ArrayOrContainerT:
+    """Calls :func:`with_array_context` on *ary* only if its type registers a
+    specific implementation. This assumes that the components of *ary* already
+    have *actx* associated, in which case the default implementation would
+    just rebuild *ary*.
+    """
+    if with_array_context.dispatch(type(ary)) is _with_array_context_default:
+        return ary
+
+    return with_array_context(ary, actx)
+
+
+def _rec_map_array_container_with_actx(
+        f: Callable[[Any], Any],
+        ary: ArrayOrContainer,
+        actx: ArrayContext | None) -> ArrayOrContainer:
+    """Equivalent to ``with_array_context(rec_map_array_container(f, ary), actx)``,
+    but only traverses *ary* once.
+    """
+    def rec(ary_: ArrayOrContainer) -> ArrayOrContainer:
+        try:
+            iterable = serialize_container(ary_)
+        except NotAnArrayContainerError:
+            return f(ary_)
+        else:
+            return _with_array_context_shallow(
+                deserialize_container(ary_, [
+                    (key, rec(subary)) for key, subary in iterable
+                    ]),
+                actx)
+
+    return rec(ary)
+
+
+def _rec_keyed_map_array_container_with_actx(
+        f: Callable[[tuple[SerializationKey, ...], Any], Any],
+        ary: ArrayOrContainer,
+        actx: ArrayContext | None) -> ArrayOrContainer:
+    """Equivalent to ``with_array_context(rec_keyed_map_array_container(f, ary),
+    actx)``, but only traverses *ary* once.
+    """
+    def rec(keys: tuple[SerializationKey, ...],
+            ary_: ArrayOrContainer) -> ArrayOrContainer:
+        try:
+            iterable = serialize_container(ary_)
+        except NotAnArrayContainerError:
+            return f(keys, ary_)
+        else:
+            return _with_array_context_shallow(
+                deserialize_container(ary_, [
+                    (key, rec((*keys, key), subary)) for key, subary in iterable
+                    ]),
+                actx)
+
+    return rec((), ary)
+
 # }}}
 
 
@@ -53,15 +53,22 @@ THE SOFTWARE.
 
 import abc
 import sys
-from collections.abc import Callable
-from typing import TYPE_CHECKING, Any
+from collections.abc import Callable, Iterable, Mapping
+from dataclasses import dataclass
+from functools import lru_cache, partial
+from typing import TYPE_CHECKING, Any, TypeGuard
 
 import numpy as np
 
 from pytools import memoize_method
 from pytools.tag import Tag, ToTagSetConvertible, normalize_tags
 
-from arraycontext.container.traversal import rec_map_array_container, with_array_context
+from arraycontext.container.traversal import (
+    _rec_keyed_map_array_container_with_actx,
+    _rec_map_array_container_with_actx,
+    _with_array_context_shallow,
+    rec_map_array_container,
+)
 from arraycontext.context import (
     Array,
     ArrayContext,
@@ -86,32 +93,220 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+# {{{ container traversal helpers
+
+# Common scalar leaf types, checked before falling back to the comparatively
+# slow np.isscalar in _rec_map_container.
+_SCALAR_TYPES = (int, float, complex, np.bool_, np.number)
+
+
+# Sentinel for the *actx* argument of _rec_map_container, since *None* is a
+# valid value there.
+_UNSET_ACTX: Any = object()
+
+
+def _identity(ary: Any) -> Any:
+    return ary
+
+
+def _make_scalar_mapper(
+        default_scalar: ScalarLike | None) -> Callable[[Any], Any]:
+    """
+    :returns: the function used by ``_rec_map_container`` to map scalar leaves:
+        scalars are kept as is if *default_scalar* is *None* and are replaced
+        by *default_scalar* (cast to the type of the leaf) otherwise.
+    """
+    if default_scalar is None:
+        return _identity
+
+    def _to_default_scalar(ary: Any) -> Any:
+        return np.dtype(type(ary)).type(default_scalar)
+
+    return _to_default_scalar
+
+
+def _is_flat_obj_array_of(
+        ary: Any, leaf_types: tuple[type, ...]) -> TypeGuard[np.ndarray]:
+    """
+    :returns: *True* if *ary* is an object array whose entries are all instances
+        of *leaf_types* that are not array containers themselves.
+    """
+    return (
+        type(ary) is np.ndarray
+        and ary.dtype.char == "O"
+        and all(
+            isinstance(subary, leaf_types)
+            and not (isinstance(subary, np.ndarray) and subary.dtype.char == "O")
+            for subary in ary.flat))
+
+
+def _map_flat_obj_array(
+        func: Callable[[Any], Any], ary: np.ndarray) -> np.ndarray:
+    """
+    Applies *func* to each entry of the object array *ary*, which is assumed
+    to satisfy :func:`_is_flat_obj_array_of`. This bypasses the generic
+    (recursive) array container traversal. The result also needs no
+    :func:`~arraycontext.with_array_context`, since object arrays use its
+    default implementation and their entries are not containers.
+    """
+    result = np.empty(ary.size, dtype=object)
+    for i, subary in enumerate(ary.flat):
+        result[i] = func(subary)
+
+    return result.reshape(ary.shape)
+
+
+# Stacking the entries of an object array in from_numpy needs twice the memory
+# (on the host and the device), so it is only done for small arrays, where the
+# latency of the individual transfers dominates.
+_FROM_NUMPY_STACK_MAX_NBYTES = 2**20
+
+
+def _is_stackable_obj_array(ary: Any) -> bool:
+    """
+    :returns: *True* if *ary* is an object array of (at least two) non-empty
+        C-contiguous :class:`numpy.ndarray` entries that all have the same
+        shape and dtype, i.e. that can be passed to :func:`numpy.stack`, and
+        that take up at most :data:`_FROM_NUMPY_STACK_MAX_NBYTES` in total.
+    """
+    if not (type(ary) is np.ndarray and ary.dtype.char == "O" and ary.size > 1):
+        return False
+
+    first = ary.flat[0]
+    if not (type(first) is np.ndarray
+            and first.dtype.char != "O"
+            and first.size > 0
+            and ary.size * first.nbytes <= _FROM_NUMPY_STACK_MAX_NBYTES):
+        return False
+
+    shape, dtype = first.shape, first.dtype
+    return all(
+        type(subary) is np.ndarray
+        and subary.shape == shape
+        and subary.dtype == dtype
+        and subary.flags.c_contiguous
+        for subary in ary.flat)
+
+# }}}
+
+
 # {{{ tag conversion
 
 def _preprocess_array_tags(tags: ToTagSetConvertible) -> frozenset[Tag]:
-    tags = normalize_tags(tags)
+    normalized_tags = normalize_tags(tags)
+    if not any(isinstance(tag, NameHint) for tag in normalized_tags):
+        # nothing to convert
+        return normalized_tags
+
+    # NOTE: warnings are emitted here rather than in the cached function, so
+    # that they are not swallowed on cache hits
+    result, warning = _preprocess_normalized_array_tags(normalized_tags)
+    if warning is not None:
+        from warnings import warn
+        warn(warning, stacklevel=1)
 
-    name_hints = [tag for tag in tags if isinstance(tag, NameHint)]
-    if name_hints:
-        name_hint, = name_hints
+    return result
 
-        from pytato.tags import PrefixNamed
-        prefix_nameds = [tag for tag in tags if isinstance(tag, PrefixNamed)]
 
-        if prefix_nameds:
-            prefix_named, = prefix_nameds
-            from warnings import warn
-            warn("When converting a "
-                    f"arraycontext.metadata.NameHint('{name_hint.name}') "
-                    "to pytato.tags.PrefixNamed, "
-                    f"PrefixNamed('{prefix_named.prefix}') "
-                    "was already present.", stacklevel=1)
+@lru_cache(maxsize=512)
+def _preprocess_normalized_array_tags(
+        tags: frozenset[Tag]) -> tuple[frozenset[Tag], str | None]:
+    """
+    :returns: a tuple ``(tags, warning)`` of the converted *tags* and a
+        message to warn with (or *None*). *tags* must contain a
+        :class:`~arraycontext.metadata.NameHint`.
+    """
+    from pytato.tags import PrefixNamed
+
+    name_hints = []
+    prefix_nameds = []
+    for tag in tags:
+        if isinstance(tag, NameHint):
+            name_hints.append(tag)
+        elif isinstance(tag, PrefixNamed):
+            prefix_nameds.append(tag)
+
+    name_hint, = name_hints
+
+    warning = None
+    if prefix_nameds:
+        prefix_named, = prefix_nameds
+        warning = ("When converting a "
+                f"arraycontext.metadata.NameHint('{name_hint.name}') "
+                "to pytato.tags.PrefixNamed, "
+                f"PrefixNamed('{prefix_named.prefix}') "
+                "was already present.")
 
-        tags = (
-                (tags | frozenset({PrefixNamed(name_hint.name)}))
-                - {name_hint})
+    tags = (
+            (tags | frozenset({PrefixNamed(name_hint.name)}))
+            - {name_hint})
 
-    return tags
+    return tags, warning
+
+# }}}
+
+
+# {{{ freeze helpers
+
+@dataclass(frozen=True)
+class _PendingFrozenArray:
+    """
+    Stands in for a leaf of the container passed to
+    :meth:`~arraycontext.ArrayContext.freeze` whose frozen value is only
+    available once the generated program has been executed.
+
+    .. attribute:: name
+
+        Name of the leaf's output in the generated program.
+    """
+    name: str
+
+
+def _get_frozen_leaf_name(key: tuple[Any, ...]) -> str:
+    """
+    :returns: the name of the output for the leaf at *key* in the program
+        generated by :meth:`~arraycontext.ArrayContext.freeze`. The name is
+        interned, since it is used for several dict lookups.
+    """
+    from arraycontext.impl.pytato.compile import _ary_container_key_stringifier
+    return sys.intern("_ary" + _ary_container_key_stringifier(key))
+
+
+def _common_prefix2(a: str, b: str) -> str:
+    n = min(len(a), len(b))
+    for i in range(n):
+        if a[i] != b[i]:
+            return a[:i]
+
+    return a[:n]
+
+
+def _get_frozen_function_name(arrays: Iterable[pytato.Array]) -> str:
+    """
+    :returns: a name for the generated function that evaluates *arrays*,
+        based on the common prefix of their :class:`pytato.tags.PrefixNamed`
+        tags (if any).
+    """
+    from pytato.tags import PrefixNamed
+
+    name_hint: str | None = None
+    for ary in arrays:
+        for tag in ary.tags:
+            if isinstance(tag, PrefixNamed):
+                name_hint = (
+                        tag.prefix if name_hint is None
+                        else _common_prefix2(name_hint, tag.prefix))
+                if not name_hint:
+                    break
+
+        if name_hint == "":
+            break
+
+    if name_hint:
+        # All PrefixNamed tags shared the (non-empty) name_hint prefix.
+        return f"frozen_{name_hint}"
+    else:
+        return "frozen_result"
 
 # }}}
 
@@ -144,11 +339,16 @@ class _BasePytatoArrayContext(ArrayContext, abc.ABC):
         """
         super().__init__()
 
-        import pytato as pt
-        self._freeze_prg_cache: dict[pt.DictOfNamedArrays, lp.TranslationUnit] = {}
+        # The second entry maps output names to their axes and tags (if the
+        # frozen arrays of the array context carry them, *None* otherwise).
+        self._freeze_prg_cache: dict[
+                pytato.DictOfNamedArrays,
+                tuple[pytato.target.BoundProgram,
+                      Mapping[str, tuple[tuple[Any, ...], frozenset[Tag]]]
+                      | None]] = {}
         self._dag_transform_cache: dict[
-                pt.DictOfNamedArrays,
-                tuple[pt.DictOfNamedArrays, str]] = {}
+                pytato.DictOfNamedArrays,
+                tuple[pytato.DictOfNamedArrays, str]] = {}
 
         if compile_trace_callback is None:
             def _compile_trace_callback(what, stage, ir):
@@ -247,6 +447,8 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
 
     .. automethod:: __init__
 
+    .. automethod:: freeze_many
+
     .. automethod:: transform_dag
 
     .. automethod:: compile
@@ -255,6 +457,7 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
             self, queue: cl.CommandQueue, allocator=None, *,
             use_memory_pool: bool | None = None,
             compile_trace_callback: Callable[[Any, str, Any], None] | None = None,
+            freeze_sync: bool = True,
 
             # do not use: only for testing
             _force_svm_arg_limit: int | None = None,
@@ -266,6 +469,16 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
             pass, and *ir* is an object containing the intermediate
             representation. This interface should be considered
             unstable.
+        :arg freeze_sync: If *True* (the default),
+            :meth:`~arraycontext.ArrayContext.freeze` waits for the generated
+            program to finish executing before returning. If *False*, the
+            completion event is only attached to the ``events`` of the frozen
+            arrays. This is safe as long as the frozen arrays are only used
+            on *queue* (e.g. after being thawed into this array context),
+            provided *queue* is in-order. Any other consumer, e.g. on a
+            different queue, must wait on the ``events`` of the arrays itself
+            (note that :mod:`pyopencl.array` operations do not do this for
+            their inputs). Out-of-order queues always wait.
         """
         if allocator is not None and use_memory_pool is not None:
             raise TypeError("may not specify both allocator and use_memory_pool")
@@ -305,9 +518,11 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
             except ImportError:
                 self.using_svm = False
 
+        import pyopencl as cl
         import pyopencl.array as cla
         import pytato as pt
         super().__init__(compile_trace_callback=compile_trace_callback)
+
         self.queue = queue
 
         self.allocator = allocator
@@ -316,8 +531,18 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
         # unused, but necessary to keep the context alive
         self.context = self.queue.context
 
+        # NOTE: without waiting, only kernels enqueued later on the same
+        # in-order queue are guaranteed to see the results of freeze
+        self._freeze_sync = freeze_sync or bool(
+            queue.properties
+            & cl.command_queue_properties.OUT_OF_ORDER_EXEC_MODE_ENABLE)
         self._force_svm_arg_limit = _force_svm_arg_limit
 
+        # maps (exact) argument types to their handler in einsum
+        self._einsum_arg_handlers: dict[
+                type,
+                Callable[[PytatoPyOpenCLArrayContext, Any], pytato.Array]] = {}
+
     @property
     def _frozen_array_types(self) -> tuple[type, ...]:
         import pyopencl.array as cla
@@ -327,7 +552,8 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
             self, func: Callable[[Array], Array], array: ArrayOrContainer,
             allowed_types: tuple[type, ...] | None = None, *,
             default_scalar: ScalarLike | None = None,
-            strict: bool = False) -> ArrayOrContainer:
+            strict: bool = False,
+            actx: ArrayContext | None = _UNSET_ACTX) -> ArrayOrContainer:
         import pytato as pt
 
         import arraycontext.impl.pyopencl.taggable_cl_array as tga
@@ -335,53 +561,97 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
         if allowed_types is None:
             allowed_types = (pt.Array, tga.TaggableCLArray)
 
-        def _wrapper(ary):
-            if isinstance(ary, allowed_types):
-                return func(ary)
-            elif not strict and isinstance(ary, self._frozen_array_types):
-                from warnings import warn
-                warn(f"Invoking {type(self).__name__}.{func.__name__[1:]} with"
-                    f" {type(ary).__name__} will be unsupported in 2023. Use"
-                    " 'to_tagged_cl_array' to convert instances to"
-                    " TaggableCLArray.", DeprecationWarning, stacklevel=2)
-
-                return func(tga.to_tagged_cl_array(ary))
-            elif np.isscalar(ary):
-                if default_scalar is None:
-                    return ary
+        if _is_flat_obj_array_of(array, allowed_types):
+            return _map_flat_obj_array(func, array)
+
+        # NOTE: _wrapper is called for every leaf, so everything it needs is
+        # looked up once here
+        map_scalar = _make_scalar_mapper(default_scalar)
+        scalar_types = _SCALAR_TYPES
+        is_scalar = np.isscalar
+
+        def _raise_unsupported(ary):
+            raise TypeError(
+                f"{type(self).__name__}.{func.__name__[1:]} invoked with "
+                f"an unsupported array type: got '{type(ary).__name__}', "
+                f"but expected one of {allowed_types}")
+
+        if strict:
+            # NOTE: the strict wrapper skips the deprecated frozen-array branch
+            def _wrapper(ary):
+                if isinstance(ary, allowed_types):
+                    return func(ary)
+                elif isinstance(ary, scalar_types) or is_scalar(ary):
+                    return map_scalar(ary)
                 else:
-                    return np.array(ary).dtype.type(default_scalar)
-            else:
-                raise TypeError(
-                    f"{type(self).__name__}.{func.__name__[1:]} invoked with "
-                    f"an unsupported array type: got '{type(ary).__name__}', "
-                    f"but expected one of {allowed_types}")
+                    _raise_unsupported(ary)
+        else:
+            frozen_array_types = self._frozen_array_types
+            to_tagged_cl_array = tga.to_tagged_cl_array
+
+            def _wrapper(ary):
+                if isinstance(ary, allowed_types):
+                    return func(ary)
+                elif isinstance(ary, frozen_array_types):
+                    from warnings import warn
+                    warn(f"Invoking {type(self).__name__}.{func.__name__[1:]} with"
+                        f" {type(ary).__name__} will be unsupported in 2023. Use"
+                        " 'to_tagged_cl_array' to convert instances to"
+                        " TaggableCLArray.", DeprecationWarning, stacklevel=2)
+
+                    return func(to_tagged_cl_array(ary))
+                elif isinstance(ary, scalar_types) or is_scalar(ary):
+                    return map_scalar(ary)
+                else:
+                    _raise_unsupported(ary)
 
-        return rec_map_array_container(_wrapper, array)
+        if actx is _UNSET_ACTX:
+            return rec_map_array_container(_wrapper, array)
+        else:
+            return _rec_map_array_container_with_actx(_wrapper, array, actx)
 
     # {{{ ArrayContext interface
 
     def from_numpy(self, array):
+        import pyopencl.array as cla
         import pytato as pt
 
         import arraycontext.impl.pyopencl.taggable_cl_array as tga
 
+        if _is_stackable_obj_array(array):
+            # NOTE: the entries are uploaded in a single transfer and then
+            # copied into their own arrays on the device, since generated
+            # kernels do not generally accept arrays with offsets.
+            stacked = cla.to_device(
+                    self.queue, np.stack(tuple(array.flat)),
+                    allocator=self.allocator)
+
+            result = np.empty(array.size, dtype=object)
+            for i in range(array.size):
+                result[i] = pt.make_data_wrapper(
+                    tga.to_tagged_cl_array(stacked[i].copy()))
+
+            return _with_array_context_shallow(result.reshape(array.shape), self)
+
         def _from_numpy(ary):
             return pt.make_data_wrapper(
                 tga.to_device(self.queue, ary, allocator=self.allocator)
                 )
 
-        return with_array_context(
-            self._rec_map_container(_from_numpy, array, (np.ndarray,), strict=True),
-            actx=self)
+        return self._rec_map_container(
+            _from_numpy, array, (np.ndarray,), strict=True, actx=self)
 
     def to_numpy(self, array):
+        # NOTE: the transfers are only enqueued here (so that they can overlap)
+        # and all of them are waited for at once below.
         def _to_numpy(ary):
-            return ary.get(queue=self.queue)
+            result, _ = ary.get_async(queue=self.queue)
+            return result
+
+        result = self._rec_map_container(_to_numpy, self.freeze(array), actx=None)
+        self.queue.finish()
 
-        return with_array_context(
-            self._rec_map_container(_to_numpy, self.freeze(array)),
-            actx=None)
+        return result
 
     @memoize_method
     def get_target(self):
@@ -432,78 +702,79 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
             return super().get_target()
 
     def freeze(self, array):
-        if np.isscalar(array):
-            return array
+        frozen, = self.freeze_many((array,))
+        return frozen
 
+    def freeze_many(
+            self, arrays: tuple[ArrayOrContainer, ...]
+            ) -> tuple[ArrayOrContainer, ...]:
+        """
+        Returns a :class:`tuple` with each of *arrays* frozen as in
+        :meth:`~arraycontext.ArrayContext.freeze`. All of *arrays* are
+        evaluated together in a single generated program, i.e. with a single
+        code generation (or cache lookup) and a single kernel launch.
+        """
         import pyopencl.array as cla
         import pytato as pt
 
-        from arraycontext.container.traversal import rec_keyed_map_array_container
-        from arraycontext.impl.pyopencl.taggable_cl_array import (
-            TaggableCLArray,
-            to_tagged_cl_array,
-        )
-        from arraycontext.impl.pytato.compile import _ary_container_key_stringifier
+        import arraycontext.impl.pyopencl.taggable_cl_array as tga
         from arraycontext.impl.pytato.utils import (
             _normalize_pt_expr,
             get_cl_axes_from_pt_axes,
         )
 
-        array_as_dict: dict[str, cla.Array | TaggableCLArray | pt.Array] = {}
-        key_to_frozen_subary: dict[str, TaggableCLArray] = {}
         key_to_pt_arrays: dict[str, pt.Array] = {}
 
-        def _record_leaf_ary_in_dict(
+        def _freeze_leaf(
+                iarray: int,
                 key: tuple[Any, ...],
-                ary: cla.Array | TaggableCLArray | pt.Array) -> None:
-            key_str = "_ary" + _ary_container_key_stringifier(key)
-            array_as_dict[key_str] = ary
-
-        rec_keyed_map_array_container(_record_leaf_ary_in_dict, array)
-
-        # {{{ remove any non pytato arrays from array_as_dict
-
-        for key, subary in array_as_dict.items():
-            if isinstance(subary, TaggableCLArray):
-                key_to_frozen_subary[key] = subary.with_queue(None)
-            elif isinstance(subary, self._frozen_array_types):
+                subary: cla.Array | tga.TaggableCLArray | pt.Array
+                ) -> tga.TaggableCLArray | _PendingFrozenArray:
+            if isinstance(subary, tga.TaggableCLArray):
+                return subary if subary.queue is None else subary.with_queue(None)
+            elif isinstance(subary, cla.Array):
                 from warnings import warn
                 warn(f"Invoking {type(self).__name__}.freeze with"
                     f" {type(subary).__name__} will be unsupported in 2023. Use"
                     " `to_tagged_cl_array` to convert instances to TaggableCLArray.",
                     DeprecationWarning, stacklevel=2)
 
-                key_to_frozen_subary[key] = (
-                    to_tagged_cl_array(subary.with_queue(None)))
+                return tga.to_tagged_cl_array(subary.with_queue(None))
             elif isinstance(subary, pt.DataWrapper):
                 # trivial freeze.
-                key_to_frozen_subary[key] = to_tagged_cl_array(
-                    subary.data,
-                    axes=get_cl_axes_from_pt_axes(subary.axes),
-                    tags=subary.tags)
+                data = subary.data
+                axes = get_cl_axes_from_pt_axes(subary.axes)
+                if (isinstance(data, tga.TaggableCLArray)
+                        and data.axes == axes
+                        and data.tags == subary.tags):
+                    # e.g. freeze(thaw(ary)): metadata is already in place
+                    return data if data.queue is None else data.with_queue(None)
+
+                frozen = tga.to_tagged_cl_array(data, axes=axes, tags=subary.tags)
+                return frozen if frozen.queue is None else frozen.with_queue(None)
             elif isinstance(subary, pt.Array):
                 # Don't be tempted to take shortcuts here, e.g. for empty
                 # arrays, as this will inhibit metadata propagation that
                 # may happen in transform_dag below. See
                 # https://github.com/inducer/arraycontext/pull/167#issuecomment-1151877480
-                key_to_pt_arrays[key] = subary
+                name = _get_frozen_leaf_name((iarray, *key))
+                key_to_pt_arrays[name] = subary
+                return _PendingFrozenArray(name)
             else:
                 raise TypeError(
                     f"{type(self).__name__}.freeze invoked with an unsupported "
                     f"array type: got '{type(subary).__name__}', but expected one "
                     f"of {self.array_types}")
 
-        # }}}
-
-        def _to_frozen(key: tuple[Any, ...], ary) -> TaggableCLArray:
-            key_str = "_ary" + _ary_container_key_stringifier(key)
-            return key_to_frozen_subary[key_str]
+        frozen_templates = tuple(
+            array if np.isscalar(array)
+            else _rec_keyed_map_array_container_with_actx(
+                partial(_freeze_leaf, iarray), array, None)
+            for iarray, array in enumerate(arrays))
 
         if not key_to_pt_arrays:
             # all cl arrays => no need to perform any codegen
-            return with_array_context(
-                    rec_keyed_map_array_container(_to_frozen, array),
-                    actx=None)
+            return frozen_templates
 
         pt_dict_of_named_arrays = pt.make_dict_of_named_arrays(
                 key_to_pt_arrays)
@@ -511,26 +782,16 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
                 pt_dict_of_named_arrays)
 
         try:
-            pt_prg = self._freeze_prg_cache[normalized_expr]
+            pt_prg, name_in_program_to_axes_and_tags = (
+                    self._freeze_prg_cache[normalized_expr])
         except KeyError:
             try:
                 transformed_dag, function_name = (
                         self._dag_transform_cache[normalized_expr])
             except KeyError:
                 transformed_dag = self.transform_dag(normalized_expr)
-
-                from pytato.tags import PrefixNamed
-                name_hint_tags = []
-                for subary in key_to_pt_arrays.values():
-                    name_hint_tags.extend(subary.tags_of_type(PrefixNamed))
-
-                from pytools import common_prefix
-                name_hint = common_prefix([nh.prefix for nh in name_hint_tags])
-                if name_hint:
-                    # All name_hint_tags shared at least some common prefix.
-                    function_name = f"frozen_{name_hint}"
-                else:
-                    function_name = "frozen_result"
+                function_name = _get_frozen_function_name(
+                        key_to_pt_arrays.values())
 
                 self._dag_transform_cache[normalized_expr] = (
                         transformed_dag, function_name)
@@ -547,45 +808,61 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
                                        ).bind_to_context(self.context)
             pt_prg = pt_prg.with_transformed_translation_unit(
                     self.transform_loopy_program)
-            self._freeze_prg_cache[normalized_expr] = pt_prg
-        else:
-            transformed_dag, function_name = (
-                    self._dag_transform_cache[normalized_expr])
 
+            name_in_program_to_axes_and_tags = {
+                name: (get_cl_axes_from_pt_axes(out.axes), out.tags)
+                for name, out in transformed_dag._data.items()}
+
+            self._freeze_prg_cache[normalized_expr] = (
+                    pt_prg, name_in_program_to_axes_and_tags)
+
+        assert name_in_program_to_axes_and_tags is not None
         assert len(pt_prg.bound_arguments) == 0
         evt, out_dict = pt_prg(self.queue,
                 allocator=self.allocator,
                 **bound_arguments)
-        evt.wait()
-        assert len(set(out_dict) & set(key_to_frozen_subary)) == 0
-
-        key_to_frozen_subary = {
-            **key_to_frozen_subary,
-            **{k: to_tagged_cl_array(
-                    v.with_queue(None),
-                    axes=get_cl_axes_from_pt_axes(transformed_dag[k].expr.axes),
-                    tags=transformed_dag[k].expr.tags)
-               for k, v in out_dict.items()}
-        }
-
-        return with_array_context(
-                rec_keyed_map_array_container(_to_frozen, array),
-                actx=None)
+
+        if self._freeze_sync:
+            evt.wait()
+        else:
+            # NOTE: see the caveats for freeze_sync in __init__
+            for v in out_dict.values():
+                v.add_event(evt)
+
+        # NOTE: the outputs were just allocated by pt_prg and are not shared,
+        # so they can be detached in place instead of through with_queue.
+        for v in out_dict.values():
+            v.queue = None
+
+        def _to_frozen(
+                ary: tga.TaggableCLArray | _PendingFrozenArray
+                ) -> tga.TaggableCLArray:
+            if not isinstance(ary, _PendingFrozenArray):
+                return ary
+
+            axes, tags = name_in_program_to_axes_and_tags[ary.name]
+            return tga.to_tagged_cl_array(
+                    out_dict[ary.name],
+                    axes=axes,
+                    tags=tags)
+
+        return tuple(
+            _rec_map_array_container_with_actx(_to_frozen, frozen_template, None)
+            for frozen_template in frozen_templates)
 
     def thaw(self, array):
         import pytato as pt
 
         import arraycontext.impl.pyopencl.taggable_cl_array as tga
-        from .utils import get_pt_axes_from_cl_axes
+        from arraycontext.impl.pytato.utils import get_pt_axes_from_cl_axes
 
         def _thaw(ary):
             return pt.make_data_wrapper(ary.with_queue(self.queue),
                                         axes=get_pt_axes_from_cl_axes(ary.axes),
                                         tags=ary.tags)
 
-        return with_array_context(
-            self._rec_map_container(_thaw, array, (tga.TaggableCLArray,)),
-            actx=self)
+        return self._rec_map_container(
+            _thaw, array, (tga.TaggableCLArray,), actx=self)
 
     def tag(self, tags: ToTagSetConvertible, array):
         def _tag(ary):
@@ -608,7 +885,7 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
         from pytato.loopy import call_loopy
         from pytato.scalar_expr import SCALAR_CLASSES
 
-        from arraycontext.impl.pyopencl.taggable_cl_array import TaggableCLArray
+        import arraycontext.impl.pyopencl.taggable_cl_array as tga
 
         entrypoint = program.default_entrypoint.name
 
@@ -616,10 +893,10 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
 
         processed_kwargs = {}
 
-        for kw, arg in sorted(kwargs.items()):
+        for kw, arg in kwargs.items():
             if isinstance(arg, (pt.Array, *SCALAR_CLASSES)):
                 pass
-            elif isinstance(arg, TaggableCLArray):
+            elif isinstance(arg, tga.TaggableCLArray):
                 arg = self.thaw(arg)
             else:
                 raise ValueError(f"call_loopy argument '{kw}' expected to be an"
@@ -642,31 +919,59 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
         dag = pt.transform.materialize_with_mpms(dag)
         return dag
 
-    def einsum(self, spec, *args, arg_names=None, tagged=()):
+    def _get_einsum_arg_handler(
+            self, arg_type: type
+            ) -> Callable[[PytatoPyOpenCLArrayContext, Any], pytato.Array]:
+        try:
+            return self._einsum_arg_handlers[arg_type]
+        except KeyError:
+            pass
+
         import pytato as pt
 
         import arraycontext.impl.pyopencl.taggable_cl_array as tga
 
+        def _thaw_deprecated(actx, arg):
+            from warnings import warn
+            warn(f"Invoking {type(actx).__name__}.einsum with"
+                f" {type(arg).__name__} will be unsupported in 2023. Use"
+                " `to_tagged_cl_array` to convert instances to TaggableCLArray.",
+                DeprecationWarning, stacklevel=3)
+            return actx.thaw(tga.to_tagged_cl_array(arg))
+
+        def _pass_through(actx, arg):
+            return arg
+
+        if issubclass(arg_type, tga.TaggableCLArray):
+            handler = type(self).thaw
+        elif issubclass(arg_type, self._frozen_array_types):
+            handler = _thaw_deprecated
+        elif issubclass(arg_type, pt.Array):
+            handler = _pass_through
+        else:
+            raise TypeError(
+                f"{type(self).__name__}.einsum invoked with an unsupported "
+                f"array type: got '{arg_type.__name__}', but expected one "
+                f"of {self.array_types}")
+
+        self._einsum_arg_handlers[arg_type] = handler
+        return handler
+
+    def einsum(self, spec, *args, arg_names=None, tagged=()):
+        import pytato as pt
+
         if arg_names is None:
             arg_names = (None,) * len(args)
 
+        handlers = self._einsum_arg_handlers
+
         def preprocess_arg(name, arg):
-            if isinstance(arg, tga.TaggableCLArray):
-                ary = self.thaw(arg)
-            elif isinstance(arg, self._frozen_array_types):
-                from warnings import warn
-                warn(f"Invoking {type(self).__name__}.einsum with"
-                    f" {type(arg).__name__} will be unsupported in 2023. Use"
-                    " `to_tagged_cl_array` to convert instances to TaggableCLArray.",
-                    DeprecationWarning, stacklevel=2)
-                ary = self.thaw(tga.to_tagged_cl_array(arg))
-            elif isinstance(arg, pt.Array):
-                ary = arg
-            else:
-                raise TypeError(
-                    f"{type(self).__name__}.einsum invoked with an unsupported "
-                    f"array type: got '{type(arg).__name__}', but expected one "
-                    f"of {self.array_types}")
+            arg_type = type(arg)
+            handler = handlers.get(arg_type)
+            if handler is None:
+                handler = self._get_einsum_arg_handler(arg_type)
+
+            ary = handler(self, arg)
 
             if name is not None:
                 # Tagging Placeholders with naming-related tags is pointless:
@@ -686,7 +991,8 @@ class PytatoPyOpenCLArrayContext(_BasePytatoArrayContext):
             ]).tagged(_preprocess_array_tags(tagged))
 
     def clone(self):
-        return type(self)(self.queue, self.allocator)
+        return type(self)(self.queue, self.allocator,
+                freeze_sync=self._freeze_sync)
 
     # }}}
 
@@ -717,6 +1023,7 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
         import jax.numpy as jnp
         import pytato as pt
         super().__init__(compile_trace_callback=compile_trace_callback)
+
         self.array_types = (pt.Array, jnp.ndarray)
 
     @property
@@ -728,25 +1035,33 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
             self, func: Callable[[Array], Array], array: ArrayOrContainer,
             allowed_types: tuple[type, ...] | None = None, *,
             default_scalar: ScalarLike | None = None,
-            strict: bool = False) -> ArrayOrContainer:
+            strict: bool = False,
+            actx: ArrayContext | None = _UNSET_ACTX) -> ArrayOrContainer:
         if allowed_types is None:
             allowed_types = self.array_types
 
+        if _is_flat_obj_array_of(array, allowed_types):
+            return _map_flat_obj_array(func, array)
+
+        map_scalar = _make_scalar_mapper(default_scalar)
+        scalar_types = _SCALAR_TYPES
+        is_scalar = np.isscalar
+
         def _wrapper(ary):
             if isinstance(ary, allowed_types):
                 return func(ary)
-            elif np.isscalar(ary):
-                if default_scalar is None:
-                    return ary
-                else:
-                    return np.array(ary).dtype.type(default_scalar)
+            elif isinstance(ary, scalar_types) or is_scalar(ary):
+                return map_scalar(ary)
             else:
                 raise TypeError(
                     f"{type(self).__name__}.{func.__name__[1:]} invoked with "
                     f"an unsupported array type: got '{type(ary).__name__}', "
                     f"but expected one of {allowed_types}")
 
-        return rec_map_array_container(_wrapper, array)
+        if actx is _UNSET_ACTX:
+            return rec_map_array_container(_wrapper, array)
+        else:
+            return _rec_map_array_container_with_actx(_wrapper, array, actx)
 
     # {{{ ArrayContext interface
 
@@ -757,9 +1072,8 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
         def _from_numpy(ary):
             return pt.make_data_wrapper(jax.device_put(ary))
 
-        return with_array_context(
-            self._rec_map_container(_from_numpy, array, (np.ndarray,)),
-            actx=self)
+        return self._rec_map_container(
+            _from_numpy, array, (np.ndarray,), actx=self)
 
     def to_numpy(self, array):
         import jax
@@ -767,9 +1081,7 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
         def _to_numpy(ary):
             return jax.device_get(ary)
 
-        return with_array_context(
-            self._rec_map_container(_to_numpy, self.freeze(array)),
-            actx=None)
+        return self._rec_map_container(_to_numpy, self.freeze(array), actx=None)
 
     def freeze(self, array):
         if np.isscalar(array):
@@ -778,63 +1090,71 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
         import jax.numpy as jnp
         import pytato as pt
 
-        from arraycontext.container.traversal import rec_keyed_map_array_container
-        from arraycontext.impl.pytato.compile import _ary_container_key_stringifier
+        from arraycontext.impl.pytato.utils import _normalize_pt_expr
 
-        array_as_dict: dict[str, jnp.ndarray | pt.Array] = {}
-        key_to_frozen_subary: dict[str, jnp.ndarray] = {}
+        jax_ndarray = jnp.ndarray
         key_to_pt_arrays: dict[str, pt.Array] = {}
 
-        def _record_leaf_ary_in_dict(key: tuple[Any, ...],
-                                     ary: jnp.ndarray | pt.Array) -> None:
-            key_str = "_ary" + _ary_container_key_stringifier(key)
-            array_as_dict[key_str] = ary
-
-        rec_keyed_map_array_container(_record_leaf_ary_in_dict, array)
-
-        # {{{ remove any non pytato arrays from array_as_dict
-
-        for key, subary in array_as_dict.items():
-            if isinstance(subary, jnp.ndarray):
-                key_to_frozen_subary[key] = subary.block_until_ready()
+        def _freeze_leaf(
+                key: tuple[Any, ...],
+                subary: jnp.ndarray | pt.Array
+                ) -> jnp.ndarray | _PendingFrozenArray:
+            if isinstance(subary, jax_ndarray):
+                return subary.block_until_ready()
             elif isinstance(subary, pt.DataWrapper):
                 # trivial freeze.
-                key_to_frozen_subary[key] = subary.data.block_until_ready()
+                return subary.data.block_until_ready()
             elif isinstance(subary, pt.Array):
-                key_to_pt_arrays[key] = subary
+                name = _get_frozen_leaf_name(key)
+                key_to_pt_arrays[name] = subary
+                return _PendingFrozenArray(name)
             else:
                 raise TypeError(
                     f"{type(self).__name__}.freeze invoked with an unsupported "
                     f"array type: got '{type(subary).__name__}', but expected one "
                     f"of {self.array_types}")
 
-        # }}}
-
-        def _to_frozen(key: tuple[Any, ...], ary) -> jnp.ndarray:
-            key_str = "_ary" + _ary_container_key_stringifier(key)
-            return key_to_frozen_subary[key_str]
+        frozen_template = _rec_keyed_map_array_container_with_actx(
+                _freeze_leaf, array, None)
 
         if not key_to_pt_arrays:
-            # all cl arrays => no need to perform any codegen
-            return with_array_context(
-                    rec_keyed_map_array_container(_to_frozen, array),
-                    actx=None)
+            # all jax arrays => no need to perform any codegen
+            return frozen_template
 
         pt_dict_of_named_arrays = pt.make_dict_of_named_arrays(key_to_pt_arrays)
-        transformed_dag = self.transform_dag(pt_dict_of_named_arrays)
-        pt_prg = pt.generate_jax(transformed_dag, jit=True)
-        out_dict = pt_prg()
-        assert len(set(out_dict) & set(key_to_frozen_subary)) == 0
+        normalized_expr, bound_arguments = _normalize_pt_expr(
+                pt_dict_of_named_arrays)
 
-        key_to_frozen_subary = {
-            **key_to_frozen_subary,
-            **{k: v.block_until_ready()
-               for k, v in out_dict.items()}
-        }
+        try:
+            pt_prg, _ = self._freeze_prg_cache[normalized_expr]
+        except KeyError:
+            try:
+                transformed_dag, function_name = (
+                        self._dag_transform_cache[normalized_expr])
+            except KeyError:
+                transformed_dag = self.transform_dag(normalized_expr)
+                function_name = _get_frozen_function_name(
+                        key_to_pt_arrays.values())
+
+                self._dag_transform_cache[normalized_expr] = (
+                        transformed_dag, function_name)
+
+            pt_prg = pt.generate_jax(transformed_dag,
+                                     jit=True,
+                                     function_name=function_name)
+
+            # NOTE: JAX arrays do not carry axes or tags
+            self._freeze_prg_cache[normalized_expr] = (pt_prg, None)
 
-        return with_array_context(
-            rec_keyed_map_array_container(_to_frozen, array),
-            actx=None)
+        out_dict = pt_prg(**bound_arguments)
+
+        def _to_frozen(ary: jnp.ndarray | _PendingFrozenArray) -> jnp.ndarray:
+            if not isinstance(ary, _PendingFrozenArray):
+                return ary
+
+            return out_dict[ary.name].block_until_ready()
+
+        return _rec_map_array_container_with_actx(_to_frozen, frozen_template, None)
 
     def thaw(self, array):
         import pytato as pt
@@ -842,18 +1162,19 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
         def _thaw(ary):
             return pt.make_data_wrapper(ary)
 
-        return with_array_context(
-            self._rec_map_container(_thaw, array, self._frozen_array_types),
-            actx=self)
+        return self._rec_map_container(
+            _thaw, array, self._frozen_array_types, actx=self)
 
     def compile(self, f: Callable[..., Any]) -> Callable[..., Any]:
         from .compile import LazilyJAXCompilingFunctionCaller
         return LazilyJAXCompilingFunctionCaller(self, f)
 
     def tag(self, tags: ToTagSetConvertible, array):
+        import jax.numpy as jnp
+        jax_ndarray = jnp.ndarray
+
         def _tag(ary):
-            import jax.numpy as jnp
-            if isinstance(ary, jnp.ndarray):
+            if isinstance(ary, jax_ndarray):
                 return ary
             else:
                 return ary.tagged(_preprocess_array_tags(tags))
@@ -861,9 +1182,11 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
         return self._rec_map_container(_tag, array)
 
     def tag_axis(self, iaxis, tags: ToTagSetConvertible, array):
+        import jax.numpy as jnp
+        jax_ndarray = jnp.ndarray
+
         def _tag_axis(ary):
-            import jax.numpy as jnp
-            if isinstance(ary, jnp.ndarray):
+            if isinstance(ary, jax_ndarray):
                 return ary
             else:
                 return ary.with_tagged_axis(iaxis, tags)
@@ -881,13 +1204,15 @@ class PytatoJAXArrayContext(_BasePytatoArrayContext):
             " ArrayContext.np.")
 
     def einsum(self, spec, *args, arg_names=None, tagged=()):
+        import jax.numpy as jnp
         import pytato as pt
+        jax_ndarray = jnp.ndarray
+
         if arg_names is None:
             arg_names = (None,) * len(args)
 
         def preprocess_arg(name, arg):
-            import jax.numpy as jnp
-            if isinstance(arg, jnp.ndarray):
+            if isinstance(arg, jax_ndarray):
                 ary = self.thaw(arg)
             elif isinstance(arg, pt.Array):
                 ary = arg
@@ -33,6 +33,7 @@ THE SOFTWARE.
 
 
 from collections.abc import Mapping
+from functools import lru_cache
 from typing import TYPE_CHECKING, Any, cast
 
 from pytato.array import (
@@ -118,6 +119,7 @@ def get_pt_axes_from_cl_axes(axes: tuple[ClAxis, ...]) -> tuple[PtAxis, ...]:
     return tuple(PtAxis(axis.tags) for axis in axes)
 
 
+@lru_cache
 def get_cl_axes_from_pt_axes(axes: tuple[PtAxis, ...]) -> tuple[ClAxis, ...]:
     return tuple(ClAxis(axis.tags) for axis in axes)
 
@@ -108,6 +108,106 @@ def test_tags_preserved_after_freeze(actx_factory):
     assert foo.axes[1].tags_of_type(BazTag)
 
 
+def test_freeze_many(actx_factory):
+    from pytools.obj_array import make_obj_array
+
+    actx = actx_factory()
+
+    from numpy.random import default_rng
+    rng = default_rng()
+
+    x = actx.from_numpy(rng.random(10))
+    y = actx.from_numpy(rng.random(10))
+
+    arrays = (2 * x, make_obj_array([x + y, actx.np.sin(y)]), x, 3)
+    frozen = actx.freeze_many(arrays)
+
+    # all arrays are evaluated by the same program
+    assert len(actx._freeze_prg_cache) == 1
+
+    assert len(frozen) == len(arrays)
+    assert frozen[-1] == 3
+
+    # data wrappers are frozen without a program and are detached as well
+    frozen_x, = actx.freeze_many((actx.thaw(actx.freeze(x)),))
+    assert frozen_x.queue is None
+    frozen_x, = actx.freeze_many((actx.tag(FooTag(), x),))
+    assert frozen_x.queue is None
+
+    # everything is frozen already, so no new program is needed
+    refrozen = actx.freeze_many(frozen)
+    assert len(actx._freeze_prg_cache) == 1
+    assert len(refrozen) == len(arrays)
+    assert refrozen[-1] == 3
+
+    for ary, frozen_ary, refrozen_ary in zip(
+            arrays[:-1], frozen[:-1], refrozen[:-1], strict=True):
+        error = actx.np.linalg.norm(actx.thaw(frozen_ary) - ary)
+        assert actx.to_numpy(error) < 1.0e-15
+
+        error = actx.np.linalg.norm(actx.thaw(refrozen_ary) - ary)
+        assert actx.to_numpy(error) < 1.0e-15
+
+
+def test_freeze_sync(actx_factory):
+    import numpy as np
+
+    queue = actx_factory().queue
+    sync_actx = _PytatoPyOpenCLArrayContextForTests(queue, freeze_sync=True)
+    async_actx = _PytatoPyOpenCLArrayContextForTests(queue, freeze_sync=False)
+
+    from numpy.random import default_rng
+    rng = default_rng()
+    x_np = rng.random(1024)
+
+    # clones keep the synchronization behavior
+    assert sync_actx.clone()._freeze_sync
+    assert not async_actx.clone()._freeze_sync
+
+    results = []
+    for actx in (sync_actx, async_actx, async_actx.clone()):
+        x = actx.from_numpy(x_np)
+        frozen = actx.freeze(actx.np.sin(x) + 2 * x)
+        assert frozen.queue is None
+
+        # use the result on the same queue and directly on the host
+        result = actx.to_numpy(actx.thaw(frozen) + 1)
+        assert np.array_equal(result, frozen.get(queue=queue) + 1)
+
+        results.append(result)
+
+    sync_result, *async_results = results
+    for async_result in async_results:
+        assert np.array_equal(sync_result, async_result)
+
+
+@pytest.mark.parametrize(("shape", "stackable"), [
+    ((10,), True),
+    ((2**18,), False),
+    ])
+def test_from_numpy_obj_array_round_trip(actx_factory, shape, stackable):
+    import numpy as np
+
+    from pytools.obj_array import make_obj_array
+
+    from arraycontext.impl.pytato import _is_stackable_obj_array
+
+    actx = actx_factory()
+
+    from numpy.random import default_rng
+    rng = default_rng()
+
+    # the small arrays are uploaded in one go, the large ones separately
+    ary = make_obj_array([rng.random(shape) for _ in range(3)])
+    assert _is_stackable_obj_array(ary) == stackable
+
+    result = actx.to_numpy(actx.from_numpy(ary))
+
+    assert result.shape == ary.shape
+    for subary, result_subary in zip(ary, result, strict=True):
+        assert np.array_equal(subary, result_subary)
+
+
 def test_arg_size_limit(actx_factory):
     ran_callback = False
 
@@ -228,6 +228,52 @@ def test_stringify_array_container_tree() -> None:
 # }}}
 
 
+# {{{ test_rec_map_array_container_with_actx
+
+def test_rec_map_array_container_with_actx() -> None:
+    from arraycontext import NumpyArrayContext
+    from arraycontext.container.traversal import (
+        _rec_keyed_map_array_container_with_actx,
+        _rec_map_array_container_with_actx,
+        rec_keyed_map_array_container,
+        rec_map_array_container,
+        with_array_context,
+    )
+    from testlib import DOFArray, Velocity2D
+
+    actx = NumpyArrayContext()
+    rng = np.random.default_rng(seed=42)
+
+    def make_dof_array():
+        return DOFArray(None, (rng.random(10), rng.random(5)))
+
+    ary = Velocity2D(u=make_dof_array(), v=make_dof_array(), array_context=None)
+
+    def f(x):
+        return 2 * x
+
+    def keyed_f(key, x):
+        return 2 * x
+
+    for result, expected in [
+            (_rec_map_array_container_with_actx(f, ary, actx),
+             with_array_context(rec_map_array_container(f, ary), actx)),
+            (_rec_keyed_map_array_container_with_actx(keyed_f, ary, actx),
+             with_array_context(rec_keyed_map_array_container(keyed_f, ary), actx)),
+            ]:
+        assert result.array_context is expected.array_context
+        assert result.u.array_context is actx
+        assert result.v.array_context is actx
+
+        for component in ("u", "v"):
+            for subary, expected_subary in zip(
+                    getattr(result, component).data,
+                    getattr(expected, component).data, strict=True):
+                assert np.array_equal(subary, expected_subary)
+
+# }}}
+
+
 if __name__ == "__main__":
     import sys
     if len(sys.argv) > 1: